@@ -9,7 +9,11 @@ setup(
         "requests",
         "packaging",
         "PyYAML",
+        "urllib3>=1.26",
     ],
+    extras_require={
+        "fast": ["orjson", "ijson"],
+    },
     entry_points={
         "console_scripts": [
             "autodpd=autodpd.autodpd:main",
@@ -1,21 +1,427 @@
 import argparse
+import functools
+import os
+import types
 from pathlib import Path
 from importlib.metadata import distributions
 import sys
+import sysconfig
 import importlib.util
-from typing import Dict, Set, List, Tuple, Optional
+from typing import Dict, Set, List, Tuple, Optional, Iterator
 import ast
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+try:
+    import ijson
+except ImportError:
+    ijson = None
 from packaging import version
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import yaml
-from time import sleep
+# The LibYAML-backed dumper is much faster and produces the same output
+try:
+    from yaml import CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeDumper as _YamlDumper
 from packaging.utils import canonicalize_name
 from autodpd.version import __version__
 
-class autodpd:
+# Accept header selecting the JSON form of PyPI's Simple API (PEP 691)
+_PYPI_SIMPLE_JSON = 'application/vnd.pypi.simple.v1+json'
+
+# Directories that never contain project sources worth scanning; hidden
+# directories (.git, .venv, .tox, ...) are skipped as well
+_SKIP_DIRS = frozenset({
+    'node_modules', 'venv', '__pycache__', 'build', 'dist'
+})
+
+_SOURCE_SUFFIXES = ('.py', '.ipynb')
+
+def _iter_source_files(directory: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (path, suffix) for Python files and Jupyter notebooks under directory,
+    pruning hidden directories and those in _SKIP_DIRS
+    """
+    # Explicit stack instead of recursion keeps deep trees cheap
+    stack = [directory]
+    while stack:
+        # Unreadable directories are skipped, as rglob did, instead of aborting the scan
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if name not in _SKIP_DIRS and not name.startswith('.'):
+                        stack.append(entry.path)
+                elif name.endswith(_SOURCE_SUFFIXES):
+                    yield entry.path, '.py' if name.endswith('.py') else '.ipynb'
+
+# Packages implied by file content rather than by an import statement
+_CONTENT_HINTS = (
+    ('python-louvain', ('import community',)),
+    ('h5py', ('.h5', '.hdf5')),
+    ('anndata', ('scanpy', 'AnnData', 'adata')),
+)
+_CONTENT_HINTS_BYTES = tuple(
+    (pkg_name, tuple(pattern.encode() for pattern in patterns))
+    for pkg_name, patterns in _CONTENT_HINTS
+)
+
+def _stream_notebook_cells(file_path: str) -> List[str]:
+    """
+    Stream a Jupyter notebook with ijson and return the source of its code cells.
+    Only cell types and sources are kept, so embedded outputs are never built.
+    """
+    code_cells = []
+    cell_type = None
+    source = []
+    has_cells = False
+    
+    try:
+        with open(file_path, 'rb') as file:
+            for prefix, event, value in ijson.parse(file):
+                if prefix == 'cells.item.cell_type':
+                    cell_type = value
+                elif event == 'string' and prefix in ('cells.item.source', 'cells.item.source.item'):
+                    source.append(value)
+                elif prefix == 'cells.item' and event == 'end_map':
+                    if cell_type == 'code':
+                        code_cells.append(''.join(source))
+                    cell_type = None
+                    source = []
+                elif prefix == 'cells' and event == 'start_array':
+                    has_cells = True
+    except ijson.JSONError as e:
+        raise json.JSONDecodeError(str(e), '', 0) from e
+    
+    if not has_cells:
+        raise KeyError('cells')
+    return code_cells
+
+# Notebooks at least this large are streamed even when orjson is available,
+# so embedded outputs are never held in memory as a whole document
+_STREAM_NOTEBOOK_MIN_BYTES = 16 * 1024 * 1024
+
+def _load_notebook_cells(file_path: str) -> List[str]:
+    """
+    Read a Jupyter notebook once and return the source of its code cells
+    """
+    # orjson loads typical notebooks faster than any ijson backend streams
+    # them, so streaming is reserved for saving memory on huge notebooks, or
+    # for standing in for the stdlib parser when ijson's C backend is there
+    if ijson is not None:
+        if orjson is None:
+            stream = ijson.backend == 'yajl2_c'
+        else:
+            stream = os.path.getsize(file_path) >= _STREAM_NOTEBOOK_MIN_BYTES
+        if stream:
+            return _stream_notebook_cells(file_path)
+    
+    # Both orjson and json decode the raw bytes directly
+    notebook = _json_loads(Path(file_path).read_bytes())
+    
+    return [
+        ''.join(cell['source'])
+        for cell in notebook['cells']
+        if cell['cell_type'] == 'code'
+    ]
+
+# Bump when the scanner output changes so stale cache entries are ignored
+_SCAN_CACHE_FORMAT = 2
+
+# Below this many files to parse, starting worker processes costs more than it saves
+_PARALLEL_SCAN_MIN_FILES = 64
+
+def _usable_cpu_count() -> int:
+    """Number of CPUs this process may run on, honouring affinity masks where supported"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def _scan_one_file(file_path: str, suffix: str) -> Tuple[Set[str], Set[str], Set[str], Set[Tuple[int, int]], List[str]]:
+    """
+    Read, parse and scan a single Python file or Jupyter notebook.
+    Returns (imports, relative imports, content hints, versions, error messages).
+    """
+    scanner = _FileScanner()
+    hints = set()
+    errors = []
+
+    def process_content(content, report=True) -> bool:
+        """Helper function to process file content"""
+        try:
+            tree = ast.parse(content, filename=str(file_path))
+        except Exception as e:
+            if report:
+                errors.append(f"Error parsing {file_path}: {e}")
+            return False
+
+        # Check for specific import patterns
+        content_hints = _CONTENT_HINTS_BYTES if isinstance(content, bytes) else _CONTENT_HINTS
+        for pkg_name, patterns in content_hints:
+            if any(pattern in content for pattern in patterns):
+                hints.add(pkg_name)
+
+        scanner.visit(tree)
+        return True
+
+    if suffix == '.py':
+        try:
+            # ast.parse decodes source bytes itself, honouring BOMs and coding cookies
+            process_content(Path(file_path).read_bytes())
+        except Exception as e:
+            errors.append(f"Error reading {file_path}: {e}")
+    else:
+        try:
+            code_cells = _load_notebook_cells(file_path)
+        except Exception as e:
+            errors.append(f"Error reading notebook {file_path}: {e}")
+        else:
+            # Parse the notebook as a whole, falling back to single cells
+            # when some of them do not parse (e.g. IPython magics)
+            if not process_content('\n'.join(code_cells), report=False):
+                for content in code_cells:
+                    process_content(content)
+
+    return scanner.imports, scanner.relative, hints, scanner.versions, errors
+
+def _encode_scan_result(result: tuple) -> list:
+    """Convert a _scan_one_file result into plain JSON data"""
+    imports, relative, hints, versions, errors = result
+    return [sorted(imports), sorted(relative), sorted(hints), sorted(versions), list(errors)]
+
+def _decode_scan_result(data) -> tuple:
+    """
+    Rebuild a _scan_one_file result from cached JSON data.
+    Raises ValueError/TypeError when the data is malformed.
+    """
+    imports, relative, hints, versions, errors = data
+    if not all(isinstance(name, str) for name in imports + relative + hints + errors):
+        raise ValueError("Malformed scan cache entry")
+    return (
+        set(imports),
+        set(relative),
+        set(hints),
+        {(int(major), int(minor)) for major, minor in versions},
+        errors
+    )
+
+def _scan_files(sources: List[Tuple[str, str]], cache: Optional[Dict[str, list]] = None) -> Tuple[List[tuple], int]:
+    """
+    Return the _scan_one_file result for each (path, suffix) in sources, in order,
+    along with the number of entries written to cache. Cached results are reused
+    while a file's mtime and size are unchanged; the remaining files are parsed in
+    worker processes when there are enough of them.
+    """
+    results = [None] * len(sources)
+    stamps = {}
+    misses = []
+    for index, (file_path, suffix) in enumerate(sources):
+        if cache is not None:
+            try:
+                stat = os.stat(file_path)
+                stamps[index] = [_SCAN_CACHE_FORMAT, stat.st_mtime_ns, stat.st_size]
+                entry = cache.get(file_path)
+                if entry is not None and entry[0] == stamps[index]:
+                    results[index] = _decode_scan_result(entry[1])
+                    continue
+            except Exception:
+                pass
+        misses.append(index)
+
+    paths = [sources[index][0] for index in misses]
+    suffixes = [sources[index][1] for index in misses]
+    scanned = None
+    workers = _usable_cpu_count()
+    if len(misses) >= _PARALLEL_SCAN_MIN_FILES and workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                scanned = list(executor.map(_scan_one_file, paths, suffixes, chunksize=32))
+        except (OSError, RuntimeError, BrokenProcessPool):
+            scanned = None  # No usable worker processes here, scan serially
+    if scanned is None:
+        scanned = list(map(_scan_one_file, paths, suffixes))
+
+    written = 0
+    for index, result in zip(misses, scanned):
+        results[index] = result
+        if index in stamps:
+            cache[sources[index][0]] = [stamps[index], _encode_scan_result(result)]
+            written += 1
+    return results, written
+
+# Only available on Python 3.10+; older versions rely on find_spec alone
+_STDLIB_MODULE_NAMES = getattr(sys, 'stdlib_module_names', frozenset())
+
+# Directories holding the standard library of the running interpreter
+_STDLIB_PATHS = tuple({
+    os.path.normcase(os.path.realpath(sysconfig.get_paths()[key]))
+    for key in ('stdlib', 'platstdlib')
+})
+
+def _in_stdlib_path(location: str) -> bool:
+    """Check if location is inside the standard library, but not in site-packages"""
+    location = os.path.normcase(os.path.realpath(location))
+    if 'site-packages' in location or 'dist-packages' in location:
+        return False
+    return any(
+        location == path or location.startswith(path + os.sep)
+        for path in _STDLIB_PATHS
+    )
+
+@functools.lru_cache(maxsize=None)
+def _is_standard_library(module_name: str) -> bool:
+    """
+    Check if a module is part of the Python standard library.
+    Cached per module name since find_spec has to stat sys.path entries.
+    """
+    if module_name in _STDLIB_MODULE_NAMES:
+        return True
+    
+    # Try to find the module spec
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return False
+    if spec is None:
+        return False
+    
+    if spec.origin in ('built-in', 'frozen'):
+        return True
+    
+    # Only modules located inside the interpreter's stdlib directories count;
+    # namespace packages have no origin and are judged by their search paths
+    if spec.origin:
+        return _in_stdlib_path(spec.origin)
+    locations = list(spec.submodule_search_locations or [])
+    return bool(locations) and all(_in_stdlib_path(location) for location in locations)
+
+@functools.lru_cache(maxsize=None)
+def _get_installed_packages() -> types.MappingProxyType:
+    """
+    Map lowercase distribution names to installed versions.
+    Read once per process; call _get_installed_packages.cache_clear() after
+    installing or removing packages to pick up the change.
+    """
+    installed_packages = {}
+    for dist in distributions():
+        # Skip distributions with broken metadata
+        try:
+            name = dist.metadata['Name']
+            if name:
+                installed_packages[sys.intern(name.lower())] = dist.version
+        except Exception:
+            continue
+    return types.MappingProxyType(installed_packages)
+
+# Nodes that never hold an import or a version feature worth descending into
+_SKIP_NODES = (ast.expr_context, ast.arg, ast.operator, ast.boolop, ast.unaryop, ast.cmpop)
+# Once versions are settled expressions can be skipped too, as imports are statements
+_SKIP_NODES_IMPORTS_ONLY = _SKIP_NODES + (ast.expr,)
+
+class _FileScanner:
+    """
+    Single-pass visitor collecting imports and syntax-based Python version
+    requirements from a parsed file
+    """
     def __init__(self):
-        """Initialize autodpd with standard library list and cache"""
+        self.imports = set()   # top-level names of absolute imports
+        self.relative = set()  # top-level names of relative imports
+        self.versions = set()  # (major, minor) tuples
+        self.versions_done = False
+
+    def visit(self, tree):
+        """
+        Walk tree with an explicit stack, dispatching on the exact node type
+        and pruning subtrees that cannot contribute anything
+        """
+        dispatch = self._dispatch
+        pending = deque([tree])
+        while pending:
+            node = pending.pop()
+            handler = dispatch.get(type(node))
+            if handler is not None:
+                handler(self, node)
+            
+            # Once the newest detectable feature has been seen only imports
+            # are left to collect
+            skip = _SKIP_NODES_IMPORTS_ONLY if self.versions_done else _SKIP_NODES
+            for child in ast.iter_child_nodes(node):
+                if not isinstance(child, skip):
+                    pending.append(child)
+
+    def visit_Import(self, node):
+        for name in node.names:
+            self.imports.add(name.name.partition('.')[0])
+
+    def visit_ImportFrom(self, node):
+        if node.module:
+            base_name = node.module.partition('.')[0]
+            if node.level > 0:
+                self.relative.add(base_name)
+            else:
+                self.imports.add(base_name)
+
+    # Python 3.5+: Type hints
+    def visit_AnnAssign(self, node):
+        self.versions.add((3, 5))
+
+    # Python 3.6+: f-strings
+    def visit_JoinedStr(self, node):
+        self.versions.add((3, 6))
+
+    # Python 3.7+: dataclasses
+    def visit_ClassDef(self, node):
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Name) and decorator.id == 'dataclass':
+                self.versions.add((3, 7))
+
+    # Python 3.8+: walrus operator
+    def visit_NamedExpr(self, node):
+        self.versions.add((3, 8))
+
+    # Python 3.9+: Dictionary union operators
+    def visit_BinOp(self, node):
+        if isinstance(node.op, ast.BitOr):
+            if isinstance(node.left, ast.Dict) or isinstance(node.right, ast.Dict):
+                self.versions.add((3, 9))
+
+    # Python 3.10+: match statements
+    def visit_Match(self, node):
+        self.versions.add((3, 10))
+        self.versions_done = True
+
+# Node type -> visitor method; node types missing from this Python's ast
+# module (e.g. Match before 3.10) are simply left out
+_FileScanner._dispatch = {
+    getattr(ast, name[len('visit_'):]): handler
+    for name, handler in vars(_FileScanner).items()
+    if name.startswith('visit_') and hasattr(ast, name[len('visit_'):])
+}
+
+class autodpd:
+    def __init__(self, cache_dir: Optional[str] = '.autodpd_cache'):
+        """
+        Initialize autodpd with standard library list and cache.
+        Per-file scan results are kept in cache_dir between runs; pass None to disable.
+        """
         self.stdlib_list = {
             'abc', 'aifc', 'argparse', 'array', 'ast', 'asynchat', 'asyncio', 'asyncore', 
             'atexit', 'audioop', 'base64', 'bdb', 'binascii', 'binhex', 'bisect', 'builtins',
@@ -47,140 +453,185 @@ class autodpd:
             'zipapp', 'zipfile', 'zipimport', 'zlib'
         }
         self.pypi_cache = {}  # Cache for PyPI lookups
+        # Shared session so PyPI lookups reuse pooled HTTPS connections and
+        # only back off when PyPI actually throttles or fails
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET']
+        )
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry))
         self.deps = None
+        self.cache_dir = cache_dir
         
     def analyze_imports(self, file_path: Path) -> Set[str]:
         """
         Analyze a Python file and extract all import statements
         """
-        with open(file_path, 'r', encoding='utf-8') as file:
-            try:
-                tree = ast.parse(file.read())
-            except SyntaxError:
-                print(f"Warning: Syntax error in {file_path}")
-                return set()
-
-        imports = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for name in node.names:
-                    imports.add(name.name.split('.')[0])
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    imports.add(node.module.split('.')[0])
-        return imports
+        try:
+            tree = ast.parse(Path(file_path).read_bytes(), filename=str(file_path))
+        except SyntaxError:
+            print(f"Warning: Syntax error in {file_path}")
+            return set()
+
+        scanner = _FileScanner()
+        scanner.visit(tree)
+        return scanner.imports | scanner.relative
 
     def is_standard_library(self, module_name: str) -> bool:
         """
         Check if a module is part of the Python standard library
         """
-        if module_name in sys.stdlib_module_names:
-            return True
-        
-        # Try to find the module spec
-        spec = importlib.util.find_spec(module_name)
-        if spec is None:
-            return False
-        
-        # If the module location contains 'site-packages', it's third-party
-        location = spec.origin if spec.origin else ''
-        return 'site-packages' not in location and 'dist-packages' not in location
+        return _is_standard_library(module_name)
 
     def analyze_notebook_imports(self, file_path: Path) -> Set[str]:
         """
         Analyze a Jupyter notebook and extract all import statements from code cells
         """
-        imports = set()
-        
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                notebook = json.load(file)
-                
-            # Extract code from all code cells
-            code_cells = [
-                cell['source'] 
-                for cell in notebook['cells'] 
-                if cell['cell_type'] == 'code'
-            ]
-            
-            # Combine all code cells and analyze as a single Python file
-            combined_code = '\n'.join(
-                source if isinstance(source, str) else ''.join(source)
-                for source in code_cells
-            )
-            
-            try:
-                tree = ast.parse(combined_code)
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        for name in node.names:
-                            imports.add(name.name.split('.')[0])
-                    elif isinstance(node, ast.ImportFrom):
-                        if node.module:
-                            imports.add(node.module.split('.')[0])
-            except SyntaxError:
-                print(f"Warning: Syntax error in notebook {file_path}")
-                
+            code_cells = _load_notebook_cells(file_path)
         except (json.JSONDecodeError, KeyError):
             print(f"Warning: Could not parse notebook {file_path}")
+            return set()
         
-        return imports
+        # Combine all code cells and analyze as a single Python file
+        try:
+            scanner = _FileScanner()
+            scanner.visit(ast.parse('\n'.join(code_cells)))
+        except SyntaxError:
+            print(f"Warning: Syntax error in notebook {file_path}")
+            return set()
+        
+        return scanner.imports | scanner.relative
 
-    def analyze_python_version_notebook(self, file_path: Path) -> Set[float]:
+    def analyze_python_version_notebook(self, file_path: Path) -> Set[Tuple[int, int]]:
         """
         Analyze a Jupyter notebook to determine minimum Python version requirements
         """
-        required_versions = set()
-        
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                notebook = json.load(file)
-                
-            # Extract code from all code cells
-            code_cells = [
-                cell['source'] 
-                for cell in notebook['cells'] 
-                if cell['cell_type'] == 'code'
-            ]
+            code_cells = _load_notebook_cells(file_path)
             
-            # Combine all code cells and analyze as a single Python file
-            combined_code = '\n'.join(
-                source if isinstance(source, str) else ''.join(source)
-                for source in code_cells
-            )
-            
-            tree = ast.parse(combined_code)
             # Reuse the same version detection logic
-            for node in ast.walk(tree):
-                if isinstance(node, ast.AnnAssign):
-                    required_versions.add(3.5)
-                if isinstance(node, ast.JoinedStr):
-                    required_versions.add(3.6)
-                if isinstance(node, ast.ClassDef):
-                    for decorator in node.decorator_list:
-                        if isinstance(decorator, ast.Name) and decorator.id == 'dataclass':
-                            required_versions.add(3.7)
-                if isinstance(node, ast.NamedExpr):
-                    required_versions.add(3.8)
-                if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
-                    if isinstance(node.left, ast.Dict) or isinstance(node.right, ast.Dict):
-                        required_versions.add(3.9)
-                if hasattr(ast, 'Match') and isinstance(node, ast.Match):
-                    required_versions.add(3.10)
-                    
+            scanner = _FileScanner()
+            scanner.visit(ast.parse('\n'.join(code_cells)))
         except (json.JSONDecodeError, KeyError, SyntaxError):
             print(f"Warning: Could not analyze Python version in notebook {file_path}")
+            return set()
         
-        return required_versions
+        return scanner.versions
 
-    def detect_project_dependencies(self, directory: str = '.', include_versions: bool = False, quiet: bool = False) -> Dict[str, List[str]]:
+    def _scan_project(self, directory: str = '.', quiet: bool = False) -> Tuple[Dict[str, Set[str]], Set[Tuple[int, int]]]:
         """
-        Detect dependencies by analyzing Python files and Jupyter notebooks in a directory
+        Walk the project once, parsing each Python file and Jupyter notebook a single time,
+        and collect its imports together with the syntax-based Python version requirements
         """
         directory = Path(directory).resolve()
         if not directory.exists():
             raise ValueError(f"Directory does not exist: {directory}")
+
+        # Get all Python files and notebooks recursively
+        python_files = []
+        notebook_files = []
+        for file_path, suffix in _iter_source_files(directory):
+            if suffix == '.py':
+                python_files.append(file_path)
+            else:
+                notebook_files.append(file_path)
         
+        if not quiet:
+            print(f"Found {len(python_files)} Python files and {len(notebook_files)} Jupyter notebooks")
+        
+        # Get local modules
+        local_modules = {
+            stem for stem in (Path(path).stem for path in python_files)
+            if stem != '__init__'
+        }
+        if not quiet:
+            print(f"Found local modules: {local_modules}")
+
+        scan = {
+            'imports': set(),
+            'relative': set(),
+            'hints': set(),
+            'local_modules': local_modules
+        }
+        versions = set()
+
+        sources = [(path, '.py') for path in python_files] + [(path, '.ipynb') for path in notebook_files]
+        cache = self._load_scan_cache()
+        results, written = _scan_files(sources, cache)
+        if cache is not None:
+            # Forget files under this project that were deleted or are now skipped
+            seen = {file_path for file_path, _ in sources}
+            prefix = os.path.join(str(directory), '')
+            stale = [file_path for file_path in cache if file_path.startswith(prefix) and file_path not in seen]
+            for file_path in stale:
+                del cache[file_path]
+            if written or stale:
+                self._save_scan_cache(cache)
+
+        # Imports are classified later in this process, sharing its caches
+        for (file_path, suffix), result in zip(sources, results):
+            if not quiet:
+                kind = 'Python file' if suffix == '.py' else 'Jupyter notebook'
+                print(f"Analyzing {kind}: {file_path}")
+            
+            imports, relative, hints, file_versions, errors = result
+            scan['imports'].update(imports)
+            scan['relative'].update(relative)
+            scan['hints'].update(hints)
+            versions.update(file_versions)
+            if not quiet:
+                for message in errors:
+                    print(message)
+
+        return scan, versions
+
+    def _scan_cache_path(self) -> str:
+        """Location of the per-file scan cache"""
+        return os.path.join(self.cache_dir, 'scan.json')
+
+    def _load_scan_cache(self) -> Optional[Dict[str, list]]:
+        """
+        Load the on-disk cache of per-file scan results, or return None when
+        caching is disabled. The cache is plain JSON, so a cache file shipped
+        inside a scanned project can at worst skew results, never run code.
+        It is read with the stdlib parser, which unlike orjson accepts the lone
+        surrogates that undecodable file names are stored with.
+        """
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._scan_cache_path(), 'rb') as file:
+                cache = json.loads(file.read())
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def _save_scan_cache(self, cache: Dict[str, list]) -> None:
+        """Write the scan cache back; failures only cost the next run a rescan"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = self._scan_cache_path() + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(cache, file)
+            os.replace(temp_path, self._scan_cache_path())
+        except OSError:
+            pass
+
+    def detect_project_dependencies(self, directory: str = '.', include_versions: bool = False, quiet: bool = False) -> Dict[str, List[str]]:
+        """
+        Detect dependencies by analyzing Python files and Jupyter notebooks in a directory
+        """
+        scan, _ = self._scan_project(directory, quiet=quiet)
+        return self._classify_dependencies(scan, include_versions=include_versions, quiet=quiet)
+
+    def _classify_dependencies(self, scan: Dict[str, Set[str]], include_versions: bool = False, quiet: bool = False) -> Dict[str, List[str]]:
+        """
+        Classify the imports collected by _scan_project and print the dependency report
+        """
         dependencies = {
             'third_party': set(),
             'standard_lib': set(),
@@ -279,31 +730,8 @@ class autodpd:
             'blosc2': 'blosc2'
         }
 
-        # Get all Python files and notebooks recursively
-        python_files = list(directory.rglob('*.py'))
-        notebook_files = list(directory.rglob('*.ipynb'))
-        
-        if not quiet:
-            print(f"Found {len(python_files)} Python files and {len(notebook_files)} Jupyter notebooks")
-        
-        # Get local modules
-        local_modules = {
-            path.stem for path in python_files
-            if path.stem != '__init__'
-        }
-        if not quiet:
-            print(f"Found local modules: {local_modules}")
-
         try:
-            installed_packages = {}
-            for dist in distributions():
-                try:
-                    name = dist.metadata['Name'].lower()
-                    version = dist.version
-                    installed_packages[name] = version
-                except Exception as e:
-                    if not quiet:
-                        print(f"Error processing package {dist}: {e}")
+            installed_packages = _get_installed_packages()
             if not quiet:
                 print(f"Found {len(installed_packages)} installed packages")
         except Exception as e:
@@ -311,120 +739,39 @@ class autodpd:
                 print(f"Error getting installed packages: {e}")
             installed_packages = {}
 
-        def process_content(content, file_path):
-            """Helper function to process file content"""
-            try:
-                tree = ast.parse(content)
-                
-                # Check for specific import patterns
-                if 'import community' in content:
-                    if include_versions and 'python-louvain' in installed_packages:
-                        dependencies['third_party'].add(f"python-louvain=={installed_packages['python-louvain']}")
-                    else:
-                        dependencies['third_party'].add('python-louvain')
-                
-                # Check for h5 file operations
-                if '.h5' in content or '.hdf5' in content:
-                    if include_versions and 'h5py' in installed_packages:
-                        dependencies['third_party'].add(f"h5py=={installed_packages['h5py']}")
-                    else:
-                        dependencies['third_party'].add('h5py')
-                
-                # Check for scanpy/AnnData usage
-                if 'scanpy' in content or 'AnnData' in content or 'adata' in content:
-                    if include_versions and 'anndata' in installed_packages:
-                        dependencies['third_party'].add(f"anndata=={installed_packages['anndata']}")
-                    else:
-                        dependencies['third_party'].add('anndata')
-                
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        for name in node.names:
-                            base_name = name.name.split('.')[0].lower()
-                            
-                            # Check if it's a local import
-                            if base_name in local_modules:
-                                dependencies['local'].add(base_name)
-                                continue
-                                
-                            if base_name in self.stdlib_list:
-                                dependencies['standard_lib'].add(base_name)
-                            elif base_name in installed_packages:
-                                pkg_name = base_name
-                                if include_versions:
-                                    pkg_name = f"{base_name}=={installed_packages[base_name]}"
-                                dependencies['third_party'].add(pkg_name)
-                            else:
-                                dependencies['unknown'].add(base_name)
-                    
-                    elif isinstance(node, ast.ImportFrom):
-                        if node.module is None:
-                            continue
-                        
-                        # Handle relative imports
-                        if node.level > 0:
-                            if node.module:
-                                module_parts = node.module.split('.')
-                                base_name = module_parts[0].lower()
-                                dependencies['local'].add(base_name)
-                            continue
-                        
-                        base_name = node.module.split('.')[0].lower()
-                        
-                        if base_name in local_modules:
-                            dependencies['local'].add(base_name)
-                            continue
-                            
-                        if base_name in self.stdlib_list:
-                            dependencies['standard_lib'].add(base_name)
-                        elif base_name in installed_packages:
-                            pkg_name = base_name
-                            if include_versions:
-                                pkg_name = f"{base_name}=={installed_packages[base_name]}"
-                            dependencies['third_party'].add(pkg_name)
-                        else:
-                            dependencies['unknown'].add(base_name)
-                            
-            except Exception as e:
-                if not quiet:
-                    print(f"Error parsing {file_path}: {e}")
-
-        # Process Python files
-        for file_path in python_files:
-            if not quiet:
-                print(f"Analyzing Python file: {file_path}")
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    process_content(content, file_path)
-            except Exception as e:
-                if not quiet:
-                    print(f"Error reading {file_path}: {e}")
-
-        # Process Jupyter notebooks
-        for file_path in notebook_files:
-            if not quiet:
-                print(f"Analyzing Jupyter notebook: {file_path}")
-            try:
-                import json
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    notebook = json.load(f)
-                    for cell in notebook['cells']:
-                        if cell['cell_type'] == 'code':
-                            content = ''.join(cell['source'])
-                            process_content(content, file_path)
-            except Exception as e:
-                if not quiet:
-                    print(f"Error reading notebook {file_path}: {e}")
+        local_modules = scan['local_modules']
+
+        # Packages implied by file content
+        dependencies['third_party'].update(scan['hints'])
+
+        # Handle relative imports
+        for module_name in scan['relative']:
+            dependencies['local'].add(sys.intern(module_name.lower()))
+
+        # Classify all imports at once with set operations. Cheap in-memory
+        # checks come first; find_spec only runs for names that are neither
+        # known stdlib modules nor installed distributions. Names are interned
+        # here, after lowercasing, since interning in the scanner is lost both
+        # to .lower() and to unpickling results from worker processes
+        remaining = {sys.intern(module_name.lower()) for module_name in scan['imports']}
+        local = remaining & local_modules
+        remaining -= local
+        standard_lib = remaining & self.stdlib_list
+        remaining -= standard_lib
+        third_party = remaining & installed_packages.keys()
+        remaining -= third_party
+        standard_lib |= {name for name in remaining if _is_standard_library(name)}
+
+        dependencies['local'] |= local
+        dependencies['standard_lib'] |= standard_lib
+        dependencies['third_party'] |= third_party
+        dependencies['unknown'] |= remaining - standard_lib
 
         # Map unknown packages to their correct pip names
         mapped_unknowns = set()
         for unknown in dependencies['unknown']:
             if unknown in package_alias_map:
-                mapped_name = package_alias_map[unknown]
-                if include_versions and mapped_name in installed_packages:
-                    mapped_name = f"{mapped_name}=={installed_packages[mapped_name]}"
-                dependencies['third_party'].add(mapped_name)
+                dependencies['third_party'].add(package_alias_map[unknown])
                 mapped_unknowns.add(unknown)
 
         # Remove mapped unknowns from the unknown set
@@ -436,6 +783,14 @@ class autodpd:
             if dep not in dependencies['local']
         }
 
+        # Pin versions only now that the names are de-duplicated
+        if include_versions:
+            dependencies['third_party'] = {
+                f"{name}=={installed_packages[name.lower()]}"
+                if name.lower() in installed_packages else name
+                for name in dependencies['third_party']
+            }
+
         if not quiet:
             print("\n" + "="*60)
             print(" "*20 + "DEPENDENCY ANALYSIS REPORT")
@@ -483,76 +838,39 @@ class autodpd:
             'local': sorted(list(dependencies['local']), key=str.lower)
         }
 
-    def analyze_python_version(self, file_path: Path) -> Set[float]:
+    def analyze_python_version(self, file_path: Path) -> Set[Tuple[int, int]]:
         """
         Analyze a Python file to determine minimum Python version requirements
         based on syntax features
         """
-        with open(file_path, 'r', encoding='utf-8') as file:
-            try:
-                tree = ast.parse(file.read())
-            except SyntaxError:
-                return set()
-
-        required_versions = set()
-        
-        for node in ast.walk(tree):
-            # Python 3.5+: Type hints
-            if isinstance(node, ast.AnnAssign):
-                required_versions.add(3.5)
-            
-            # Python 3.6+: f-strings
-            if isinstance(node, ast.JoinedStr):
-                required_versions.add(3.6)
-            
-            # Python 3.7+: dataclasses
-            if isinstance(node, ast.ClassDef):
-                for decorator in node.decorator_list:
-                    if isinstance(decorator, ast.Name) and decorator.id == 'dataclass':
-                        required_versions.add(3.7)
-            
-            # Python 3.8+: walrus operator
-            if isinstance(node, ast.NamedExpr):
-                required_versions.add(3.8)
-            
-            # Python 3.9+: Dictionary union operators
-            if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
-                if isinstance(node.left, ast.Dict) or isinstance(node.right, ast.Dict):
-                    required_versions.add(3.9)
-            
-            # Python 3.10+: match statements
-            if hasattr(ast, 'Match') and isinstance(node, ast.Match):
-                required_versions.add(3.10)
+        try:
+            tree = ast.parse(Path(file_path).read_bytes(), filename=str(file_path))
+        except SyntaxError:
+            return set()
 
-        return required_versions
+        scanner = _FileScanner()
+        scanner.visit(tree)
+        return scanner.versions
 
-    def get_python_version(self, directory: str = '.') -> float:
+    def get_python_version(self, directory: str = '.') -> str:
         """
         Get recommended Python version without generating requirements
         """
-        min_python_version = 3.5  # Default minimum
-        required_versions = set()
-        
-        # Analyze all Python files and Jupyter notebooks
-        for file_path in Path(directory).rglob('*'):
-            if file_path.suffix == '.py':
-                file_versions = self.analyze_python_version(file_path)
-            elif file_path.suffix == '.ipynb':
-                file_versions = self.analyze_python_version_notebook(file_path)
-            else:
-                continue
-                
-            required_versions.update(file_versions)
-        
+        _, required_versions = self._scan_project(directory, quiet=True)
+        return self._recommend_python_version(required_versions)
+
+    def _recommend_python_version(self, required_versions: Set[Tuple[int, int]]) -> str:
+        """Pick the lowest Python version satisfying all detected syntax features"""
+        min_python_version = (3, 5)  # Default minimum
         if required_versions:
             min_python_version = max(required_versions)
         
-        return min_python_version
+        return '.'.join(map(str, min_python_version))
 
     def _verify_package_name(self, import_name: str) -> Optional[str]:
         """
         Verify package name against PyPI and return the correct package name.
-        Includes rate limiting and caching to be respectful to PyPI's service.
+        Results are cached to be respectful to PyPI's service.
         """
         # Strip version number if present
         if '==' in import_name:
@@ -574,38 +892,30 @@ class autodpd:
         normalized_name = canonicalize_name(package_name)
         
         try:
-            # Query PyPI API
-            sleep(0.1)  # Rate limiting
-            response = requests.get(f"https://pypi.org/pypi/{normalized_name}/json")
+            # Try the normalized name first, then common variations
+            variations = [
+                normalized_name,
+                f"python-{package_name.lower()}",
+                f"py{package_name.lower()}"
+            ]
             
-            if response.status_code == 200:
-                data = response.json()
-                correct_name = data['info']['name']
-                self.pypi_cache[package_name] = correct_name
-                return f"{correct_name}=={version}" if version else correct_name
-            else:
-                # Try common variations
-                variations = [
-                    package_name,
-                    package_name.lower(),
-                    package_name.replace('_', '-'),
-                    f"python-{package_name.lower()}",
-                    f"py{package_name.lower()}"
-                ]
-                
-                for variant in variations:
-                    sleep(0.1)  # Rate limiting
-                    response = requests.get(f"https://pypi.org/pypi/{variant}/json")
-                    if response.status_code == 200:
-                        data = response.json()
-                        correct_name = data['info']['name']
-                        self.pypi_cache[package_name] = correct_name
-                        return f"{correct_name}=={version}" if version else correct_name
-                
-                # If no variation works, log it and return None
-                print(f"Warning: Could not verify package name for import '{package_name}'")
-                self.pypi_cache[package_name] = None
-                return None
+            for variant in dict.fromkeys(canonicalize_name(v) for v in variations):
+                # The JSON Simple API only lists files, which is far smaller
+                # than the full release metadata of /pypi/<name>/json
+                response = self._session.get(
+                    f"https://pypi.org/simple/{variant}/",
+                    headers={'Accept': _PYPI_SIMPLE_JSON},
+                    timeout=10
+                )
+                if response.status_code == 200:
+                    correct_name = response.json()['name']
+                    self.pypi_cache[package_name] = correct_name
+                    return f"{correct_name}=={version}" if version else correct_name
+            
+            # If no variation works, log it and return None
+            print(f"Warning: Could not verify package name for import '{package_name}'")
+            self.pypi_cache[package_name] = None
+            return None
                 
         except Exception as e:
             print(f"Error verifying package '{package_name}': {str(e)}")
@@ -620,8 +930,9 @@ class autodpd:
         Analyze project files to generate Python environment specifications and save requirement files
         """
         # Get Python version and dependencies
-        python_version = self.get_python_version(directory)
-        self.deps = self.detect_project_dependencies(directory, include_versions=include_versions, quiet=quiet)
+        scan, required_versions = self._scan_project(directory, quiet=quiet)
+        python_version = self._recommend_python_version(required_versions)
+        self.deps = self._classify_dependencies(scan, include_versions=include_versions, quiet=quiet)
         
         # Only use third-party dependencies for requirements
         all_deps = sorted(list(self.deps['third_party']), key=str.lower)
@@ -634,7 +945,7 @@ class autodpd:
         if save_files:
             # Save conda environment
             with open('environment.yml', 'w') as f:
-                yaml.safe_dump(
+                yaml.dump(
                     {
                         'name': env_name,  # Use directory name as environment name
                         'channels': ['defaults', 'conda-forge'],
@@ -645,6 +956,7 @@ class autodpd:
                         ]
                     },
                     f,
+                    Dumper=_YamlDumper,
                     default_flow_style=False,
                     sort_keys=False
                 )
@@ -670,20 +982,21 @@ class autodpd:
             'environment_name': env_name
         }
 
-    def _get_version_reasoning(self, python_version: float) -> List[str]:
+    def _get_version_reasoning(self, python_version: str) -> List[str]:
         """Helper function to generate version reasoning messages"""
         reasoning = []
         version_features = [
-            (3.10, "Match statements detected (Python 3.10+)"),
-            (3.9, "Dictionary union operators detected (Python 3.9+)"),
-            (3.8, "Walrus operator detected (Python 3.8+)"),
-            (3.7, "Dataclasses detected (Python 3.7+)"),
-            (3.6, "F-strings detected (Python 3.6+)"),
-            (3.5, "Type hints detected (Python 3.5+)")
+            ((3, 10), "Match statements detected (Python 3.10+)"),
+            ((3, 9), "Dictionary union operators detected (Python 3.9+)"),
+            ((3, 8), "Walrus operator detected (Python 3.8+)"),
+            ((3, 7), "Dataclasses detected (Python 3.7+)"),
+            ((3, 6), "F-strings detected (Python 3.6+)"),
+            ((3, 5), "Type hints detected (Python 3.5+)")
         ]
         
+        current = tuple(int(part) for part in python_version.split('.'))
         for ver, msg in version_features:
-            if python_version >= ver:
+            if current >= ver:
                 reasoning.append(msg)
         
         return reasoning
@@ -699,7 +1012,7 @@ class autodpd:
         }
         
         with open(output_file, 'w') as f:
-            yaml.safe_dump(conda_env, f, default_flow_style=False, sort_keys=False)
+            yaml.dump(conda_env, f, Dumper=_YamlDumper, default_flow_style=False, sort_keys=False)
         
         print(f"\nConda environment configuration saved to {output_file}")
 
@@ -736,9 +1049,15 @@ def main():
         help='Include package version numbers in requirements'
     )
     
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or write the per-file scan cache (.autodpd_cache)'
+    )
+    
     args = parser.parse_args()
     
-    detector = autodpd()
+    detector = autodpd(cache_dir=None if args.no_cache else '.autodpd_cache')
     env_specs = detector.generate_environment(
         directory=args.directory,
         save_files=not args.no_save,